@@ -5,12 +5,19 @@ import argparse
 from datetime import datetime, timedelta
 from mcstatus import JavaServer
 import matplotlib.pyplot as plt
-from statistics import mean, stdev
+import numpy as np
 import textwrap
+from contextlib import contextmanager
+from itertools import groupby
+from operator import itemgetter
+from urllib.request import pathname2url
 import threading
 import queue
 import sys
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import msvcrt
+from downsample import lttb_indices
 
 plt.rcParams['font.sans-serif'] = ['SimHei']  # 修复中文显示
 plt.rcParams['axes.unicode_minus'] = False
@@ -20,19 +27,40 @@ plt.switch_backend('Agg')  # 非交互式后端
 CONFIG = {
     "interval": 300,  # 数据采集间隔（秒）
     "db_name": "server_stats.db",
-    "never_delete_data": True
+    "never_delete_data": True,
+    "plot_width_px": 1400,  # 趋势图宽度（像素），决定降采样的目标点数
+    "dns_cache_ttl": 3600  # 服务器地址（含SRV记录）解析结果缓存时间（秒）
 }
 # ================================================
 
 class DBAccess:
     def __init__(self):
-        self.conn = sqlite3.connect(CONFIG['db_name'], check_same_thread=False)
+        # 唯一的写连接，手动管理事务（BEGIN/COMMIT）
+        self._writer = sqlite3.connect(CONFIG['db_name'], isolation_level=None,
+                                       check_same_thread=False)
         self.lock = threading.Lock()
+        # 每个线程各自的只读连接，WAL 模式下读写互不阻塞
+        self._tls = threading.local()
+        self._ro_uri = 'file:' + pathname2url(os.path.abspath(CONFIG['db_name'])) + '?mode=ro'
+        self._init_pragmas()
         self._init_db()
+
+    def _init_pragmas(self):
+        mode = self._writer.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if mode.lower() != 'wal':
+            print(f"[警告] 文件系统不支持WAL模式，当前日志模式: {mode}")
+        self._writer.execute("PRAGMA synchronous=NORMAL")
+        self._writer.execute("PRAGMA foreign_keys=ON")  # 使 ON DELETE CASCADE 生效
+        self._tune(self._writer)
+
+    @staticmethod
+    def _tune(conn):
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-20000")
+        conn.execute("PRAGMA mmap_size=268435456")
         
     def _init_db(self):
-        with self.lock:
-            c = self.conn.cursor()
+        with self.transaction() as c:
             c.execute('''CREATE TABLE IF NOT EXISTS servers
                         (id INTEGER PRIMARY KEY AUTOINCREMENT,
                         name TEXT UNIQUE,
@@ -43,126 +71,242 @@ class DBAccess:
                         online INTEGER,
                         timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
                         FOREIGN KEY(server_id) REFERENCES servers(id) ON DELETE CASCADE)''')
-            self.conn.commit()
+            c.execute('''CREATE INDEX IF NOT EXISTS idx_stats_server_ts
+                        ON stats(server_id, timestamp)''')
+            c.execute('''CREATE INDEX IF NOT EXISTS idx_servers_name
+                        ON servers(name)''')
+            c.execute('''CREATE TABLE IF NOT EXISTS meta
+                        (key TEXT PRIMARY KEY,
+                        value TEXT)''')
+
+    def meta_get(self, key, default=None):
+        row = self.query("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def meta_set(self, key, value, cur=None):
+        """写入元数据；传入 cur 时并入该游标所在的事务，不单独提交"""
+        sql = "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)"
+        if cur is not None:
+            cur.execute(sql, (key, str(value)))
+        else:
+            self.write(sql, (key, str(value)))
+
+    def _reader(self):
+        conn = getattr(self._tls, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self._ro_uri, uri=True)
+            self._tune(conn)
+            self._tls.conn = conn
+        return conn
+
+    def query(self, sql, args=()):
+        """只读查询，使用当前线程的只读连接，不加锁"""
+        return self._reader().execute(sql, args)
+
+    def write(self, sql, args=()):
+        """单条写入语句（自动提交）"""
+        with self.lock:
+            return self._writer.execute(sql, args)
 
-    def execute(self, query, args=()):
+    @contextmanager
+    def transaction(self):
+        """显式事务：块内所有写入合并为一次提交，异常时回滚"""
         with self.lock:
-            c = self.conn.cursor()
-            c.execute(query, args)
-            self.conn.commit()
-            return c
+            c = self._writer.cursor()
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                yield c
+            except BaseException:
+                c.execute("ROLLBACK")
+                raise
+            else:
+                c.execute("COMMIT")
 
 class WindowsInput:
-    def __init__(self):
+    def __init__(self, out_lock):
         self.buffer = []
+        self.out_lock = out_lock  # 与主线程共用的输出锁，避免回显与状态输出交错
+        self.cmd_queue = queue.Queue(maxsize=100)
         self.input_thread = threading.Thread(target=self._input_loop, daemon=True)
         self.input_thread.start()
-        self.cmd_queue = queue.Queue()
 
     def _input_loop(self):
         while True:
-            if msvcrt.kbhit():
-                char = msvcrt.getwch()
-                if char == '\r':  # 回车键
-                    cmd = ''.join(self.buffer).strip().lower()
-                    if cmd:
-                        self.cmd_queue.put(cmd)
-                    self.buffer.clear()
-                    print()
-                elif char == '\x08':  # 退格键
-                    if self.buffer:
-                        self.buffer.pop()
-                        sys.stdout.write('\b \b')
-                else:
-                    self.buffer.append(char)
-                    sys.stdout.write(char)
-                sys.stdout.flush()
-
-    def get_cmd(self):
+            char = msvcrt.getwch()  # 阻塞等待按键，不占用CPU
+            if char == '\r':  # 回车键
+                cmd = ''.join(self.buffer).strip().lower()
+                self.buffer.clear()
+                self._echo('\n')
+                if cmd:
+                    self.cmd_queue.put(cmd)
+            elif char == '\x08':  # 退格键
+                if self.buffer:
+                    self.buffer.pop()
+                    self._echo('\b \b')
+            else:
+                self.buffer.append(char)
+                self._echo(char)
+
+    def _echo(self, text):
+        with self.out_lock:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+    def get_cmd(self, timeout=None):
+        """取出一条命令；timeout 为 None 时不等待，否则最多阻塞 timeout 秒"""
         try:
-            return self.cmd_queue.get_nowait()
+            if timeout is None:
+                return self.cmd_queue.get_nowait()
+            return self.cmd_queue.get(timeout=timeout)
         except queue.Empty:
             return None
 
 class MCMonitor:
+    # 固定的SQL文本，sqlite3 会复用已编译的语句
+    _INSERT_STATS = "INSERT INTO stats (server_id, online) VALUES (?, ?)"
+
     def __init__(self, never_delete=False):
         self.db = DBAccess()
         CONFIG['never_delete_data'] = never_delete
         self.running = True
-        self.input_handler = WindowsInput()
+        self._out_lock = threading.Lock()
+        self.input_handler = WindowsInput(self._out_lock)
+        # 网络探测线程池，并发查询各服务器状态
+        self._probe_pool = ThreadPoolExecutor(max_workers=min(32, 4 * (os.cpu_count() or 1)))
+        # 趋势图复用同一个 Figure，首次绘图时创建
+        self._fig = None
+        self._ax = None
+        # ip -> (JavaServer, 解析时间)，避免每轮采集重复进行DNS/SRV解析
+        self._mc_cache = {}
+        # (服务器列表, 名称->id) 缓存，仅在 add/remove 时失效；
+        # 失效可能发生在线程池线程中，读取方只取一次快照，不重复读属性
+        self._server_cache = None
+        self._server_gen = 0
+        self._server_lock = threading.Lock()
+
+    def say(self, msg, end='\n'):
+        """线程安全的输出，与输入回显共用同一把锁"""
+        with self._out_lock:
+            sys.stdout.write(msg + end)
+            sys.stdout.flush()
+
+    def _get_server_cache(self):
+        cache = self._server_cache
+        if cache is None:
+            gen = self._server_gen
+            c = self.db.query("SELECT id, name, ip FROM servers")
+            servers = [{"id": row[0], "name": row[1], "ip": row[2]} for row in c.fetchall()]
+            cache = (servers, {s['name']: s['id'] for s in servers})
+            with self._server_lock:
+                # 查询期间若已被其他线程失效，则本次结果可能过期，不写回
+                if gen == self._server_gen:
+                    self._server_cache = cache
+        return cache
 
     def load_servers(self):
-        c = self.db.execute("SELECT name, ip FROM servers")
-        return [{"name": row[0], "ip": row[1]} for row in c.fetchall()]
+        return list(self._get_server_cache()[0])
+
+    def _invalidate_servers(self):
+        with self._server_lock:
+            self._server_gen += 1
+            self._server_cache = None
 
     def _get_server_id(self, name):
-        c = self.db.execute("SELECT id FROM servers WHERE name = ?", (name,))
-        result = c.fetchone()
-        return result[0] if result else None
+        return self._get_server_cache()[1].get(name)
+
+    def _lookup(self, ip):
+        mc_server, resolved_at = self._mc_cache.get(ip, (None, 0))
+        if mc_server is None or time.time() - resolved_at > CONFIG['dns_cache_ttl']:
+            mc_server = JavaServer.lookup(ip, timeout=2.0)
+            self._mc_cache[ip] = (mc_server, time.time())
+        return mc_server
+
+    def _probe(self, server):
+        """查询单个服务器，返回 (server, 在线人数或异常)"""
+        try:
+            status = self._lookup(server['ip']).status()
+            return server, status.players.online
+        except Exception as e:
+            return server, e
+
+    def _probe_all(self, servers):
+        futures = [self._probe_pool.submit(self._probe, server) for server in servers]
+        for future in as_completed(futures):
+            yield future.result()
 
     def collect_data(self):
+        """采集一轮数据，返回本轮采集时间（与采集结果在同一事务中记入 meta）"""
+        now = datetime.now()
         servers = self.load_servers()
         if not servers:
-            return
+            self.db.meta_set('last_collect', now.isoformat())
+            return now
             
-        print(f"\n[{datetime.now()}] 开始采集服务器数据...")
-        for server in servers:
-            try:
-                mc_server = JavaServer.lookup(server['ip'], timeout=2.0)
-                status = mc_server.status()
-                server_id = self._get_server_id(server['name'])
-                
-                self.db.execute(
-                    "INSERT INTO stats (server_id, online) VALUES (?, ?)",
-                    (server_id, status.players.online)
-                )
-                print(f"  ✓ {server['name']}: {status.players.online}人在线")
-            except Exception as e:
-                print(f"  ✕ {server['name']} 采集失败: {str(e)}")
+        self.say(f"\n[{datetime.now()}] 开始采集服务器数据...")
+        rows = []
+        for server, result in self._probe_all(servers):
+            if isinstance(result, Exception):
+                self.say(f"  ✕ {server['name']} 采集失败: {str(result)}")
+            else:
+                rows.append((server['id'], result))
+                self.say(f"  ✓ {server['name']}: {result}人在线")
+
+        # 本轮采集结果与采集时间合并为一个事务写入
+        with self.db.transaction() as cur:
+            if rows:
+                cur.executemany(self._INSERT_STATS, rows)
+            self.db.meta_set('last_collect', now.isoformat(), cur)
+        return now
 
     def generate_report(self, days=1):
-        servers = self.load_servers()
         print(f"\n[{datetime.now()}] 生成报告...")
         
+        # 一次查询得到所有服务器的统计（无数据的服务器也保留）
+        c = self.db.query('''
+            SELECT 
+                s.name, s.ip,
+                MAX(stats.online) as peak,
+                AVG(stats.online) as avg_online,
+                COUNT(DISTINCT strftime('%Y-%m-%d', stats.timestamp)) as days
+            FROM servers s
+            LEFT JOIN stats ON stats.server_id = s.id
+                           AND stats.timestamp > datetime('now', ?)
+            GROUP BY s.id
+            ORDER BY s.id
+            ''', (f'-{days} days',))
+        
         print("\n=== 服务器状态报告 ===")
-        for server in servers:
-            c = self.db.execute('''
-                SELECT 
-                    MAX(online) as peak,
-                    AVG(online) as avg_online,
-                    COUNT(DISTINCT strftime('%Y-%m-%d', timestamp)) as days
-                FROM stats
-                JOIN servers ON servers.id = stats.server_id
-                WHERE servers.name = ?
-                  AND timestamp > datetime('now', ?)
-                ''', (server['name'], f'-{days} days'))
-            data = c.fetchone()
-            
-            print(f"\n{server['name']} ({server['ip']})")
-            print(f"  峰值人数: {data[0] or 'N/A'}")
-            print(f"  平均人数: {round(data[1], 1) if data[1] else 'N/A'}")
-            print(f"  有效天数: {data[2]}")
+        for name, ip, peak, avg_online, valid_days in c.fetchall():
+            print(f"\n{name} ({ip})")
+            print(f"  峰值人数: {peak or 'N/A'}")
+            print(f"  平均人数: {round(avg_online, 1) if avg_online else 'N/A'}")
+            print(f"  有效天数: {valid_days}")
 
     def detect_anomalies(self):
-        servers = self.load_servers()
+        names = {s['id']: s['name'] for s in self.load_servers()}
         print(f"\n[{datetime.now()}] 执行异常检测...")
-        for server in servers:
-            c = self.db.execute('''
-                SELECT online 
-                FROM stats
-                JOIN servers ON servers.id = stats.server_id
-                WHERE servers.name = ?
-                ORDER BY timestamp DESC
-                LIMIT 6
-                ''', (server['name'],))
-            
-            data = [row[0] for row in c.fetchall()]
-            if len(data) < 3:
+        if not names:
+            return
+        # 一次取出所有服务器最近12小时的样本，每个服务器内按时间倒序
+        # （按 server_id 过滤以便走 idx_stats_server_ts 范围扫描）
+        placeholders = ', '.join('?' * len(names))
+        c = self.db.query(f'''
+            SELECT server_id, online
+            FROM stats
+            WHERE server_id IN ({placeholders})
+              AND timestamp > datetime('now', '-12 hours')
+            ORDER BY server_id, timestamp DESC
+            ''', tuple(names))
+        rows = np.array(c.fetchall(), dtype=np.int64).reshape(-1, 2)
+        ids, starts = np.unique(rows[:, 0], return_index=True)
+        
+        for server_id, data in zip(ids, np.split(rows[:, 1], starts[1:])):
+            if len(data) < 3 or server_id not in names:
                 continue
                 
             current = data[0]
-            avg = mean(data[1:])
-            std = stdev(data[1:]) if len(data) > 2 else 0
+            avg = np.mean(data[1:])
+            std = np.std(data[1:], ddof=1)
             
             if std == 0:
                 threshold = avg * 1.5
@@ -170,9 +314,9 @@ class MCMonitor:
                 threshold = avg + 2*std
                 
             if current > threshold:
-                print(f"  ! {server['name']} 异常突增: {current} (平均 {round(avg,1)})")
+                print(f"  ! {names[server_id]} 异常突增: {current} (平均 {round(avg,1)})")
             elif current < (avg - 2*std):
-                print(f"  ! {server['name']} 异常下跌: {current} (平均 {round(avg,1)})")
+                print(f"  ! {names[server_id]} 异常下跌: {current} (平均 {round(avg,1)})")
 
     def clean_old_data(self):
         if CONFIG['never_delete_data']:
@@ -180,67 +324,116 @@ class MCMonitor:
             return
             
         print(f"\n[{datetime.now()}] 清理过期数据...")
-        c = self.db.execute("DELETE FROM stats WHERE timestamp < datetime('now', '-30 days')")
+        c = self.db.write("DELETE FROM stats WHERE timestamp < datetime('now', '-30 days')")
         print(f"  已删除 {c.rowcount} 条记录")
+        self.db.write("PRAGMA wal_checkpoint(TRUNCATE)")  # 限制 -wal 文件大小
 
     def plot_trend(self, server_names, days=7):
-        plt.figure(figsize=(14, 8))
+        if self._fig is None:
+            self._fig, self._ax = plt.subplots(figsize=(CONFIG['plot_width_px'] / 100, 8))
+        fig, ax = self._fig, self._ax
+        ax.clear()
         colors = plt.cm.tab10.colors
-        legend_handles = []
+        n_buckets = 4 * CONFIG['plot_width_px']  # SQL 聚合：每个像素约4个桶
+        n_line = CONFIG['plot_width_px']  # 均值折线：每个像素1个点
+        # 向上取整并预留一个桶给未与桶边界对齐的窗口起点，保证桶数不超过 n_buckets
+        bin_s = max(60, -(-days * 86400 // (n_buckets - 1)))
         
-        for idx, name in enumerate(server_names):
-            c = self.db.execute('''
-                SELECT 
-                    strftime('%Y-%m-%d %H:%M', timestamp) as time,
-                    online
-                FROM stats
-                JOIN servers ON servers.id = stats.server_id
-                WHERE servers.name = ?
-                  AND timestamp > datetime('now', ?)
-                ORDER BY timestamp
-                ''', (name, f'-{days} days'))
-            
-            data = c.fetchall()
-            if not data:
+        # 所有服务器一次查询，再按 server_id 分组
+        server_ids = [self._get_server_id(name) for name in server_names]
+        placeholders = ', '.join('?' * len(server_ids))
+        c = self.db.query(f'''
+            SELECT 
+                server_id,
+                CAST(strftime('%s', timestamp) AS INTEGER) / ? AS bucket,
+                MIN(online), MAX(online), AVG(online)
+            FROM stats
+            WHERE server_id IN ({placeholders})
+              AND timestamp > datetime('now', ?)
+            GROUP BY server_id, bucket
+            ORDER BY server_id, bucket
+            ''', (bin_s, *server_ids, f'-{days} days'))
+        series = {sid: [row[1:] for row in group]
+                  for sid, group in groupby(c.fetchall(), key=itemgetter(0))}
+        
+        for idx, (name, server_id) in enumerate(zip(server_names, server_ids)):
+            rows = series.get(server_id)
+            if not rows:
                 print(f"  ✕ {name} 无数据")
                 continue
                 
-            times = [row[0] for row in data]
-            values = [row[1] for row in data]
-            line, = plt.plot(times, values, 
-                          color=colors[idx % len(colors)],
-                          marker='o' if days < 2 else None,
-                          linestyle='-')
-            legend_handles.append(line)
-
-        plt.title(f'服务器在线趋势（最近{days}天）')
-        plt.xlabel('时间')
-        plt.ylabel('在线人数')
-        plt.xticks(rotation=45)
-        plt.legend(legend_handles, server_names)
-        plt.grid(True)
-        plt.tight_layout()
+            # 直接交给 matplotlib 处理 datetime64 时间轴，无需逐点格式化
+            data = np.array(rows, dtype=np.float64)
+            times = (data[:, 0].astype(np.int64) * bin_s).astype('datetime64[s]')
+            lows, highs, values = data[:, 1], data[:, 2], data[:, 3]
+            color = colors[idx % len(colors)]
+            dense = len(values) > 5000  # 点数过多时以位图嵌入
+            # 桶内最小/最大值用全部桶画成阴影包络，保留所有峰谷
+            ax.fill_between(times, lows, highs, color=color, alpha=0.2, linewidth=0,
+                            rasterized=dense)
+            label = name
+            if len(values) > n_line:
+                # 均值折线点数超过像素数时用 LTTB 降采样，图例加 [R] 标记
+                keep = lttb_indices(times.astype(np.int64), values, n_line)
+                times, values = times[keep], values[keep]
+                label = f'[R] {name}'
+            ax.plot(times, values,
+                    color=color,
+                    marker='o' if days < 2 and len(values) <= 500 else None,
+                    linestyle='-',
+                    label=label,
+                    rasterized=dense)
+
+        ax.set_title(f'服务器在线趋势（最近{days}天）')
+        ax.set_xlabel('时间')
+        ax.set_ylabel('在线人数')
+        ax.legend()
+        ax.grid(True)
+        fig.autofmt_xdate(rotation=45)
         filename = f"trend_{days}d_{'_'.join(server_names)}.png"
-        plt.savefig(filename)
-        plt.close()
+        fig.savefig(filename, dpi=100, bbox_inches='tight')
         print(f"趋势图已保存至 {filename}")
 
     def add_server(self, name, ip):
-        try:
-            JavaServer.lookup(ip, timeout=2).status()
-            self.db.execute("INSERT INTO servers (name, ip) VALUES (?, ?)", (name, ip))
-            print(f"成功添加服务器: {name} ({ip})")
-        except sqlite3.IntegrityError:
-            print("错误: 服务器名称或IP已存在")
-        except Exception as e:
-            if "timed out" in str(e):
-                print(f"服务器验证失败: 连接超时（2秒未响应）")
+        """在线程池中验证服务器，验证通过后再写入数据库，不阻塞主循环"""
+        print(f"正在验证服务器: {name} ({ip})...")
+        future = self._probe_pool.submit(self._probe, {"name": name, "ip": ip})
+        future.add_done_callback(self._finish_add)
+
+    def _finish_add(self, future):
+        server, result = future.result()
+        if isinstance(result, Exception):
+            if "timed out" in str(result):
+                msg = "服务器验证失败: 连接超时（2秒未响应）"
             else:
-                print(f"服务器验证失败: {str(e)}")
+                msg = f"服务器验证失败: {str(result)}"
+        else:
+            try:
+                with self.db.transaction() as cur:
+                    cur.execute("INSERT INTO servers (name, ip) VALUES (?, ?)",
+                                (server['name'], server['ip']))
+                self._invalidate_servers()
+                msg = f"成功添加服务器: {server['name']} ({server['ip']})"
+            except sqlite3.IntegrityError:
+                msg = "错误: 服务器名称或IP已存在"
+            except sqlite3.Error as e:
+                # 回调中的异常会被 concurrent.futures 吞掉，必须在这里提示
+                msg = f"添加服务器失败: {str(e)}"
+        self.say(f"\n{msg}\n> ", end='')
 
     def remove_server(self, name):
-        c = self.db.execute("DELETE FROM servers WHERE name = ?", (name,))
-        print(f"成功删除服务器: {name}") if c.rowcount > 0 else print("错误: 未找到该服务器")
+        server_id = self._get_server_id(name)
+        for server in self.load_servers():
+            if server['name'] == name:
+                self._mc_cache.pop(server['ip'], None)
+        # 外键级联会同时删除该服务器的全部历史数据（不受永不删除模式影响）
+        n = self.db.query("SELECT COUNT(*) FROM stats WHERE server_id = ?", (server_id,)).fetchone()[0]
+        c = self.db.write("DELETE FROM servers WHERE name = ?", (name,))
+        self._invalidate_servers()
+        if c.rowcount > 0:
+            print(f"成功删除服务器: {name}（已一并删除其 {n} 条历史数据）")
+        else:
+            print("错误: 未找到该服务器")
 
     def delete_server_data(self, name):
         server_id = self._get_server_id(name)
@@ -248,27 +441,24 @@ class MCMonitor:
             print("错误: 服务器不存在")
             return
             
-        c = self.db.execute("DELETE FROM stats WHERE server_id = ?", (server_id,))
+        c = self.db.write("DELETE FROM stats WHERE server_id = ?", (server_id,))
         print(f"已删除 {c.rowcount} 条{name}的数据记录")
 
     def real_time_query(self):
         """实时查询命令实现"""
         servers = self.load_servers()
         if not servers:
-            print("\n当前没有监控任何服务器")
+            self.say("\n当前没有监控任何服务器")
             return
             
-        print(f"\n[{datetime.now()}] 实时查询结果：")
-        for server in servers:
-            try:
-                mc_server = JavaServer.lookup(server['ip'], timeout=2.0)
-                status = mc_server.status()
-                print(f"  ✓ {server['name']}: {status.players.online}人在线")
-            except Exception as e:
-                if "timed out" in str(e):
-                    print(f"  ✕ {server['name']} 查询超时（2秒未响应）")
-                else:
-                    print(f"  ✕ {server['name']} 查询失败: {str(e)}")
+        self.say(f"\n[{datetime.now()}] 实时查询结果：")
+        for server, result in self._probe_all(servers):
+            if not isinstance(result, Exception):
+                self.say(f"  ✓ {server['name']}: {result}人在线")
+            elif "timed out" in str(result):
+                self.say(f"  ✕ {server['name']} 查询超时（2秒未响应）")
+            else:
+                self.say(f"  ✕ {server['name']} 查询失败: {str(result)}")
 
     def show_help(self):
         help_text = """
@@ -276,7 +466,7 @@ class MCMonitor:
         now        - 立即查询所有服务器的实时状态
         list       - 列出所有监控的服务器
         add <名称> <IP> - 添加新服务器
-        remove <名称> - 移除服务器
+        remove <名称> - 移除服务器（同时删除其全部历史数据）
         delete <名称> - 删除服务器的历史数据
         report [天数] - 生成统计报告
         trend <天数> <服务器1> [服务器2...] - 生成趋势图
@@ -308,45 +498,74 @@ class MCMonitor:
         print("输入 'help' 查看可用命令\n")
         print("> ", end='', flush=True)
 
-        last_collect = time.time()
-        last_report = datetime.now()
-        last_clean = datetime.now()
+        # 各定时任务的下一次触发时间（时间戳），由持久化的上次执行时间推算，
+        # 重启后不会重复触发，也不会把每周清理无限推迟
+        next_collect = self._last_run('last_collect').timestamp() + CONFIG['interval']
+        next_report = self._next_daily(8, self._last_run('last_report'))
+        next_clean = (self._last_run('last_clean') + timedelta(days=7)).timestamp()
+        next_anomaly = self._next_hour(self._last_run('last_anomaly'))
 
         try:
             while self.running:
-                # 处理输入命令
-                self._process_input()
+                # 阻塞等待输入，直到最近的定时任务到期
+                # （最长等待1秒，保证 Ctrl+C 能及时响应）
+                wait = min(next_collect, next_report, next_clean, next_anomaly) - time.time()
+                self._process_input(timeout=min(max(0.0, wait), 1.0))
 
                 # 定时数据采集
-                if time.time() - last_collect >= CONFIG['interval']:
-                    self.collect_data()
-                    last_collect = time.time()
+                if time.time() >= next_collect:
+                    next_collect = self.collect_data().timestamp() + CONFIG['interval']
 
                 # 每日报告
-                now = datetime.now()
-                if now.hour == 8 and now.minute < 5:
+                if time.time() >= next_report:
                     self.generate_report(1)
-                    last_report = now
+                    next_report = self._next_daily(8, self._mark_run('last_report'))
 
                 # 每周清理
-                if (now - last_clean).days >= 7:
+                if time.time() >= next_clean:
                     self.clean_old_data()
-                    last_clean = now
+                    next_clean = (self._mark_run('last_clean') + timedelta(days=7)).timestamp()
 
                 # 每小时异常检测
-                if now.minute == 0:  
+                if time.time() >= next_anomaly:
                     self.detect_anomalies()
-
-                time.sleep(0.1)
+                    next_anomaly = self._next_hour(self._mark_run('last_anomaly'))
 
         except KeyboardInterrupt:
             self.running = False
         finally:
+            self._probe_pool.shutdown(wait=False)
             print("\n监控已停止")
 
-    def _process_input(self):
+    def _last_run(self, key):
+        """读取任务上次执行时间；首次运行时以当前时间为准并写入"""
+        value = self.db.meta_get(key)
+        if value is None:
+            return self._mark_run(key)
+        return datetime.fromisoformat(value)
+
+    def _mark_run(self, key):
+        now = datetime.now()
+        self.db.meta_set(key, now.isoformat())
+        return now
+
+    @staticmethod
+    def _next_daily(hour, after):
+        """after 之后的下一个 hour:00 的时间戳"""
+        target = after.replace(hour=hour, minute=0, second=0, microsecond=0)
+        if target <= after:
+            target += timedelta(days=1)
+        return target.timestamp()
+
+    @staticmethod
+    def _next_hour(after):
+        """after 之后的下一个整点的时间戳"""
+        return (after.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)).timestamp()
+
+    def _process_input(self, timeout=None):
         while True:
-            cmd = self.input_handler.get_cmd()
+            cmd = self.input_handler.get_cmd(timeout)
+            timeout = None  # 只阻塞等待第一条命令，其余直接取出
             if not cmd:
                 break
             try:
@@ -427,8 +646,7 @@ class MCMonitor:
         try:
             days = int(parts[1])
             servers = parts[2:]
-            valid_servers = [s['name'] for s in self.load_servers()]
-            invalid = [s for s in servers if s not in valid_servers]
+            invalid = [s for s in servers if self._get_server_id(s) is None]
             if invalid:
                 print(f"错误: 以下服务器不存在 - {', '.join(invalid)}")
                 return
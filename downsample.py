@@ -0,0 +1,100 @@
+"""趋势图降采样（Largest-Triangle-Three-Buckets）
+
+优先使用 tsdownsample（Rust实现），其次使用 numba 编译的内核，
+两者都未安装时退回到按桶向量化的 NumPy 实现。
+"""
+import numpy as np
+
+try:
+    from tsdownsample import MinMaxLTTBDownsampler  # 可选依赖
+except ImportError:
+    MinMaxLTTBDownsampler = None
+
+# numba 编译后的内核，首次降采样时才创建；False 表示 numba 不可用
+_jit_kernel = None
+
+
+def _bucket_edges(n, n_out):
+    # 首尾两点之间均分为 n_out-2 个桶
+    return np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+
+def _lttb_numpy(x, y, n_out):
+    n = len(x)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    edges = _bucket_edges(n, n_out)
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i == n_out - 3:
+            avg_x, avg_y = x[-1], y[-1]
+        else:
+            avg_x = x[hi:edges[i + 2]].mean()
+            avg_y = y[hi:edges[i + 2]].mean()
+        # 选出与上一个选中点、下一桶均值点构成三角形面积最大的点
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+def _lttb_kernel(x, y, edges, n_out):
+    n = x.shape[0]
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0] = 0
+    idx[n_out - 1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo = edges[i]
+        hi = edges[i + 1]
+        if i == n_out - 3:
+            avg_x = x[n - 1]
+            avg_y = y[n - 1]
+        else:
+            nxt = edges[i + 2]
+            avg_x = 0.0
+            avg_y = 0.0
+            for j in range(hi, nxt):
+                avg_x += x[j]
+                avg_y += y[j]
+            avg_x /= nxt - hi
+            avg_y /= nxt - hi
+        best = lo
+        max_area = -1.0
+        for j in range(lo, hi):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > max_area:
+                max_area = area
+                best = j
+        a = best
+        idx[i + 1] = a
+    return idx
+
+
+def _compiled_kernel():
+    global _jit_kernel
+    if _jit_kernel is None:
+        try:
+            import numba  # 可选依赖，延迟到首次使用时导入，不拖慢启动
+        except ImportError:
+            _jit_kernel = False
+        else:
+            # cache=True 将编译结果写入 __pycache__，后续运行无需重新编译
+            _jit_kernel = numba.njit(cache=True, boundscheck=False)(_lttb_kernel)
+    return _jit_kernel or None
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets 降采样，返回保留点的下标"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    if MinMaxLTTBDownsampler is not None:
+        return MinMaxLTTBDownsampler().downsample(x, y, n_out=n_out)
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    kernel = _compiled_kernel()
+    if kernel is not None:
+        return kernel(x, y, _bucket_edges(n, n_out), n_out)
+    return _lttb_numpy(x, y, n_out)